@@ -0,0 +1,8 @@
+# WSGI entry point for production serving.
+# Threaded workers fit this app better than gevent: the Gemini SDK's gRPC
+# transport and SQLite's busy-timeout waits both block inside C libraries
+# that never yield to a gevent event loop, so one slow call could freeze an
+# entire gevent worker. OS threads simply sit in those blocking calls while
+# the rest keep serving. Start with:
+#   gunicorn -k gthread -w 2 --threads 16 wsgi:app
+from app import app
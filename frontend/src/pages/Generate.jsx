@@ -5,6 +5,11 @@ import { useAuth } from '../App';
 
 const API_BASE = import.meta.env.VITE_API_URL;
 
+// The backend answers generation requests with 202 + a pending plan row;
+// poll the detail endpoint until the background worker flips its status.
+const POLL_INTERVAL_MS = 2000;
+const MAX_POLL_ATTEMPTS = 30;
+
 const Generate = () => {
   const { token } = useAuth();
   const navigate = useNavigate();
@@ -46,6 +51,31 @@ const Generate = () => {
     }
   };
 
+  const pollPlanStatus = async (planId) => {
+    for (let attempt = 0; attempt < MAX_POLL_ATTEMPTS; attempt++) {
+      await new Promise(resolve => setTimeout(resolve, POLL_INTERVAL_MS));
+
+      try {
+        const response = await fetch(`${API_BASE}/mealplans/${planId}`, {
+          headers: {
+            Authorization: `Bearer ${token}`
+          }
+        });
+
+        if (response.ok) {
+          const data = await response.json();
+          if (data.status !== 'pending') {
+            return data.status;
+          }
+        }
+      } catch (error) {
+        console.error('Failed to poll meal plan status:', error);
+      }
+    }
+
+    return 'pending';
+  };
+
   const handleGenerate = async (e) => {
     e.preventDefault();
     setGenerating(true);
@@ -83,10 +113,32 @@ const Generate = () => {
       const data = await response.json();
 
       if (response.ok) {
-        setMessage({
-          type: 'success',
-          text: 'Meal plan generated successfully! Redirecting to your meal plans...'
-        });
+        if (response.status === 202 && data.status === 'pending') {
+          // Generation runs in the background; wait for it to finish
+          setMessage({
+            type: 'success',
+            text: 'Meal plan queued! Waiting for the AI to finish...'
+          });
+
+          const status = await pollPlanStatus(data.plan_id);
+
+          if (status === 'failed') {
+            setMessage({ type: 'error', text: 'AI generation failed. Please try again.' });
+            return;
+          }
+
+          setMessage({
+            type: 'success',
+            text: status === 'done'
+              ? 'Meal plan generated successfully! Redirecting to your meal plans...'
+              : 'Still generating... it will appear in your meal plans shortly.'
+          });
+        } else {
+          setMessage({
+            type: 'success',
+            text: 'Meal plan generated successfully! Redirecting to your meal plans...'
+          });
+        }
 
         // Redirect after a short delay
         setTimeout(() => {
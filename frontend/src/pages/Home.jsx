@@ -193,25 +193,20 @@ const Home = () => {
                   </span>
                 </div>
 
-                {plan.plan && typeof plan.plan === 'object' && plan.plan.days ? (
+                {/* The list payload only carries the lightweight summary blob;
+                    the full plan lives behind GET /mealplans/<id> */}
+                {plan.summary && plan.summary.days ? (
                   <div className="space-y-2">
                     <p className="text-sm text-gray-600">
-                      {plan.plan.days.length} days planned
+                      {plan.summary.days} days planned
                     </p>
-                    <div className="flex flex-wrap gap-1">
-                      {plan.plan.days.slice(0, 2).map((day, dayIndex) => (
-                        <div key={dayIndex}>
-                          {day.meals?.slice(0, 2).map((meal, mealIndex) => (
-                            <span
-                              key={mealIndex}
-                              className="inline-block text-xs bg-green-100 text-green-800 px-2 py-1 rounded-full mr-1 mb-1"
-                            >
-                              {meal.name}
-                            </span>
-                          ))}
-                        </div>
-                      ))}
-                    </div>
+                    {plan.summary.first_meal && (
+                      <div className="flex flex-wrap gap-1">
+                        <span className="inline-block text-xs bg-green-100 text-green-800 px-2 py-1 rounded-full mr-1 mb-1">
+                          {plan.summary.first_meal}
+                        </span>
+                      </div>
+                    )}
                   </div>
                 ) : (
                   <p className="text-sm text-gray-500">Plan details unavailable</p>
@@ -24,6 +24,8 @@ const MealPlans = () => {
   const [total, setTotal] = useState(0);
   const [perPage] = useState(10);
   const [expandedPlan, setExpandedPlan] = useState(null);
+  const [planDetails, setPlanDetails] = useState({});
+  const [detailLoading, setDetailLoading] = useState(null);
   const [deletingPlan, setDeletingPlan] = useState(null);
   const [showDeleteModal, setShowDeleteModal] = useState(false);
   const [planToDelete, setPlanToDelete] = useState(null);
@@ -110,8 +112,37 @@ const MealPlans = () => {
     });
   };
 
+  // The list endpoint only returns lightweight columns; the full plan and
+  // grocery list are fetched from the detail endpoint the first time a plan
+  // is expanded and kept in state for subsequent expansions.
+  const fetchPlanDetails = async (planId) => {
+    setDetailLoading(planId);
+
+    try {
+      const response = await fetch(`${API_BASE}/mealplans/${planId}`, {
+        headers: {
+          Authorization: `Bearer ${token}`
+        }
+      });
+
+      if (response.ok) {
+        const data = await response.json();
+        setPlanDetails(prev => ({...prev, [planId]: data}));
+      }
+    } catch (error) {
+      console.error('Failed to fetch meal plan details:', error);
+    } finally {
+      setDetailLoading(null);
+    }
+  };
+
   const togglePlanExpansion = (planId) => {
-    setExpandedPlan(expandedPlan === planId ? null : planId);
+    const next = expandedPlan === planId ? null : planId;
+    setExpandedPlan(next);
+
+    if (next && !planDetails[planId]) {
+      fetchPlanDetails(planId);
+    }
   };
 
   const totalPages = Math.ceil(total / perPage);
@@ -180,8 +211,9 @@ const MealPlans = () => {
   // Meal Plan Card Component
   const MealPlanCard = ({plan}) => {
     const isExpanded = expandedPlan === plan.id;
-    const planData = typeof plan.plan === 'object' ? plan.plan : null;
-    const groceryData = typeof plan.grocery_list === 'object' ? plan.grocery_list : null;
+    const details = planDetails[plan.id];
+    const planData = details && typeof details.plan === 'object' ? details.plan : null;
+    const groceryData = details && typeof details.grocery_list === 'object' ? details.grocery_list : null;
 
     return (
       <div className="bg-white rounded-lg shadow-md hover:shadow-lg transition-shadow border border-gray-200">
@@ -220,8 +252,9 @@ const MealPlans = () => {
             </div>
           </div>
 
-          {/* Quick Stats */}
-          {planData && planData.days && (
+          {/* Quick Stats - full counts once details are loaded, otherwise the
+              lightweight summary that ships with the list payload */}
+          {planData && planData.days ? (
             <div className="flex flex-wrap gap-4 mt-4">
               <div className="flex items-center text-sm text-gray-600">
                 <Clock className="h-4 w-4 mr-1"/>
@@ -238,13 +271,30 @@ const MealPlans = () => {
                 </div>
               )}
             </div>
-          )}
+          ) : plan.summary && plan.summary.days ? (
+            <div className="flex flex-wrap gap-4 mt-4">
+              <div className="flex items-center text-sm text-gray-600">
+                <Clock className="h-4 w-4 mr-1"/>
+                {plan.summary.days} days
+              </div>
+              {plan.summary.first_meal && (
+                <div className="flex items-center text-sm text-gray-600">
+                  <ChefHat className="h-4 w-4 mr-1"/>
+                  {plan.summary.first_meal}
+                </div>
+              )}
+            </div>
+          ) : null}
         </div>
 
         {/* Expanded Content */}
         {isExpanded && (
           <div className="p-6">
-            {planData && planData.days ? (
+            {detailLoading === plan.id ? (
+              <div className="flex items-center justify-center py-8">
+                <div className="animate-spin rounded-full h-8 w-8 border-b-2 border-green-600"></div>
+              </div>
+            ) : planData && planData.days ? (
               <div className="space-y-6">
                 {/* Meal Plan Days */}
                 <div>